@@ -0,0 +1,204 @@
+# app/cache.py
+import functools
+import inspect
+import json
+import logging
+import time
+from typing import Dict, Optional, Sequence
+
+from fastapi.encoders import jsonable_encoder
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+from starlette.datastructures import Headers, QueryParams
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis: Optional[aioredis.Redis] = None
+_prefix = settings.CACHE_PREFIX
+_ignore_arg_types: tuple = ()
+
+
+async def init_cache(
+    host_url: str,
+    prefix: str = settings.CACHE_PREFIX,
+    ignore_arg_types: Sequence[type] = (),
+):
+    """Connect to Redis. Arguments of the given types are left out of cache keys."""
+    global _redis, _prefix, _ignore_arg_types
+    _prefix = prefix
+    _ignore_arg_types = tuple(ignore_arg_types)
+    try:
+        _redis = aioredis.from_url(
+            host_url,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+        )
+        await _redis.ping()
+        logger.info("Connected to Redis cache")
+    except RedisError as e:
+        # Serve uncached rather than failing every request
+        logger.warning("Redis cache unavailable, caching disabled: %s", e)
+        _redis = None
+
+
+async def close_cache():
+    """Close the Redis connection pool"""
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+
+
+def _build_key(func, args, kwargs) -> str:
+    bound = inspect.signature(func).bind_partial(*args, **kwargs)
+    parts = [
+        f"{name}={value}"
+        for name, value in sorted(bound.arguments.items())
+        if not isinstance(value, _ignore_arg_types)
+    ]
+    return f"{_prefix}:{func.__module__}.{func.__qualname__}({','.join(parts)})"
+
+
+def cache(expire: int):
+    """Cache the JSON-encoded result of an async function in Redis for `expire` seconds"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if _redis is None:
+                return await func(*args, **kwargs)
+
+            key = _build_key(func, args, kwargs)
+            try:
+                cached = await _redis.get(key)
+                if cached is not None:
+                    return json.loads(cached)
+            except RedisError as e:
+                logger.warning("Cache read failed for %s: %s", key, e)
+
+            result = await func(*args, **kwargs)
+
+            try:
+                await _redis.set(key, json.dumps(jsonable_encoder(result)), ex=expire)
+            except RedisError as e:
+                logger.warning("Cache write failed for %s: %s", key, e)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class CachePolicy:
+    """How long a path's responses stay fresh, and whether they may be served stale"""
+
+    def __init__(self, ttl: int, params: Sequence[str] = (), fallback: bool = True):
+        self.ttl = ttl
+        # Query parameters that select the response; all others are left out of the key
+        self.params = tuple(params)
+        self.fallback = fallback
+
+
+class CacheMiddleware:
+    """Cache successful GET responses per path policy.
+
+    Entries are stored as Redis hashes of {body, status, headers, generated_at,
+    stale_at}. Once an entry is past stale_at it is refreshed from upstream; if
+    upstream answers with a 5xx and the policy allows fallback, the stale entry
+    is returned instead with an `X-Cache: STALE` header.
+
+    A plain ASGI middleware: requests to paths without a policy pass straight
+    through, so their responses (and background tasks) are never held back.
+    """
+
+    def __init__(self, app: ASGIApp, policies: Dict[str, CachePolicy]):
+        self.app = app
+        self.policies = policies
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        policy = self.policies.get(scope["path"]) if scope["type"] == "http" else None
+        if policy is None or scope["method"] != "GET" or _redis is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = _build_http_key(scope, policy)
+
+        try:
+            entry = await _redis.hgetall(key)
+        except RedisError as e:
+            logger.warning("Cache read failed for %s: %s", key, e)
+            entry = {}
+
+        now = time.time()
+        if entry and float(entry[b"stale_at"]) > now:
+            await _entry_response(entry, "HIT")(scope, receive, send)
+            return
+
+        # Buffer the upstream response so it can be stored, or swapped for a stale entry
+        messages = []
+
+        async def capture(message: Message):
+            messages.append(message)
+
+        await self.app(scope, receive, capture)
+
+        start = messages[0]
+        status = start["status"]
+
+        if status == 200:
+            body = b"".join(m.get("body", b"") for m in messages[1:])
+            content_type = Headers(raw=start["headers"]).get("content-type", "application/json")
+            headers = {"content-type": content_type}
+            await _store_entry(key, policy, body, status, headers, now)
+            response = Response(content=body, status_code=status, headers={**headers, "X-Cache": "MISS"})
+            await response(scope, receive, send)
+            return
+
+        if status >= 500 and policy.fallback and entry:
+            logger.warning("Upstream failed for %s, serving stale response", scope["path"])
+            await _entry_response(entry, "STALE")(scope, receive, send)
+            return
+
+        for message in messages:
+            await send(message)
+
+
+def _build_http_key(scope: Scope, policy: CachePolicy) -> str:
+    """Key on the endpoint's own query parameters only, so unknown ones can't bust the cache"""
+    query_params = QueryParams(scope["query_string"])
+    query = "&".join(
+        f"{name}={value}"
+        for name in sorted(policy.params)
+        for value in query_params.getlist(name)
+    )
+    return f"{_prefix}:http:{scope['path']}?{query}"
+
+
+async def _store_entry(key: str, policy: CachePolicy, body: bytes, status: int, headers: Dict, now: float):
+    try:
+        async with _redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={
+                "body": body,
+                "status": status,
+                "headers": json.dumps(headers),
+                "generated_at": now,
+                "stale_at": now + policy.ttl,
+            })
+            # Keep the entry around past its TTL only if it may be served stale
+            pipe.expire(key, policy.ttl + (settings.CACHE_STALE_SECONDS if policy.fallback else 0))
+            await pipe.execute()
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+def _entry_response(entry: Dict[bytes, bytes], status: str) -> Response:
+    headers = json.loads(entry[b"headers"])
+    headers["X-Cache"] = status
+    return Response(
+        content=entry[b"body"],
+        status_code=int(entry[b"status"]),
+        headers=headers,
+    )
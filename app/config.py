@@ -0,0 +1,49 @@
+# app/config.py
+import os
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DEFAULT_CURSOR_SECRET = "dev-cursor-secret"
+
+
+class Settings:
+    """Application settings read from environment variables"""
+
+    # Database connection pool (Supabase pooler caps total client connections)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "3"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Postgres-side timeouts so stuck queries and forgotten transactions free their connection
+    DB_CONNECT_TIMEOUT = int(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "10000"))
+    DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = int(os.getenv("DB_IDLE_IN_TRANSACTION_TIMEOUT_MS", "30000"))
+
+    # Secret used to sign pagination cursors; set it in production
+    CURSOR_SECRET = os.getenv("CURSOR_SECRET", DEFAULT_CURSOR_SECRET)
+
+    # Run the scheduled Telegram reports in this process; enable in exactly one process
+    RUN_SCHEDULER = os.getenv("RUN_SCHEDULER", "true").lower() in ("1", "true", "yes")
+
+    # Redis
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+    # Rate limits (enforced across workers via Redis)
+    RATE_LIMIT_TOP = os.getenv("RATE_LIMIT_TOP", "30/minute")
+
+    # In-process cache of Reddit listings (seconds)
+    REDDIT_CACHE_SECONDS = int(os.getenv("REDDIT_CACHE_SECONDS", "60"))
+
+    # Response caching
+    CACHE_PREFIX = os.getenv("CACHE_PREFIX", "memes")
+
+    # Per-endpoint cache policy tiers (seconds)
+    CACHE_POLICY_SHORT = int(os.getenv("CACHE_POLICY_SHORT", "10"))
+    CACHE_POLICY_NORMAL = int(os.getenv("CACHE_POLICY_NORMAL", "60"))
+    CACHE_POLICY_LONG = int(os.getenv("CACHE_POLICY_LONG", "300"))
+    # How long an expired entry is kept to serve when upstream fails
+    CACHE_STALE_SECONDS = int(os.getenv("CACHE_STALE_SECONDS", "86400"))
+
+
+settings = Settings()
@@ -4,6 +4,7 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 import os
 from dotenv import load_dotenv
+from .config import settings
 
 load_dotenv()
 
@@ -13,11 +14,18 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 # Configure SQLAlchemy for Supabase
 engine = create_engine(
     DATABASE_URL,
-    pool_size=20,        # Supabase free tier limit
-    max_overflow=0,      # Don't exceed pool size
-    pool_timeout=30,     # Connection timeout
-    pool_recycle=1800,   # Recycle connections every 30 minutes
-    pool_pre_ping=True,  # Check connection health
+    pool_size=settings.DB_POOL_SIZE,          # Keep few idle sockets on the shared pooler
+    max_overflow=settings.DB_MAX_OVERFLOW,    # Absorb short bursts above pool_size
+    pool_timeout=settings.DB_POOL_TIMEOUT,    # Connection timeout
+    pool_recycle=settings.DB_POOL_RECYCLE,    # Recycle connections every 30 minutes
+    pool_pre_ping=True,                       # Check connection health
+    connect_args={
+        "connect_timeout": settings.DB_CONNECT_TIMEOUT,  # Fail fast if Postgres is unreachable
+        "options": (
+            f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS} "  # Server cancels runaway queries
+            f"-c idle_in_transaction_session_timeout={settings.DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}"  # Reclaim idle transactions
+        ),
+    },
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
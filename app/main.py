@@ -1,20 +1,29 @@
 # app/main.py
-from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks
+from fastapi import FastAPI, Depends, HTTPException, Query, BackgroundTasks, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.orm import Session
-from typing import Optional
+from typing import Literal, Optional
+import aiohttp
+import asyncio
 import logging
 from . import models
-from .database import get_db, engine
+from .database import get_db
 from .services.reddit import RedditService
 from .services.allmemes import MemeDBService
-from .services.telegram_report import TelegramService
+from .services.telegram_report import TelegramService, create_client as create_telegram_client, redact_token
 from dotenv import load_dotenv
 from .schemas import MemeReportRequest 
 from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
 from datetime import datetime
+from contextlib import asynccontextmanager
+from slowapi import Limiter, _rate_limit_exceeded_handler
+from slowapi.errors import RateLimitExceeded
+from slowapi.util import get_remote_address
 from .scheduler import init_scheduler
+from .config import settings, DEFAULT_CURSOR_SECRET
+from .cache import init_cache, close_cache, cache, CacheMiddleware, CachePolicy
 import os
 
 
@@ -22,18 +31,74 @@ load_dotenv()
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
+# httpx logs request URLs at INFO, and Telegram URLs carry the bot token
+logging.getLogger("httpx").setLevel(logging.WARNING)
+logging.getLogger("httpcore").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
-# Create tables
-models.Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await init_cache(
+        host_url=settings.REDIS_URL,
+        prefix=settings.CACHE_PREFIX,
+        ignore_arg_types=[Request, Response, Session, RedditService],
+    )
+    # One HTTP session per process: a single connector, DNS cache and SSL context
+    app.state.http = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+        timeout=aiohttp.ClientTimeout(total=30)
+    )
+    # One Reddit client per process, sharing the session and its OAuth token
+    app.state.reddit = RedditService(session=app.state.http)
+    # One pooled Telegram client reused by every report, whatever the bot credentials
+    app.state.telegram_client = create_telegram_client()
+    if settings.CURSOR_SECRET == DEFAULT_CURSOR_SECRET:
+        logger.warning("CURSOR_SECRET is not set; pagination cursors are signed with a public default key")
+    # Every worker runs this lifespan; only the process with RUN_SCHEDULER set sends reports
+    if settings.RUN_SCHEDULER:
+        scheduler.start()
+        logger.info("Started scheduled meme reports")
 
-app = FastAPI()
+    yield
+
+    if scheduler.running:
+        scheduler.shutdown()
+        logger.info("Stopped scheduled meme reports")
+    await app.state.telegram_client.aclose()
+    await app.state.http.close()
+    await close_cache()
+
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 scheduler = init_scheduler(app)
 
+# Shared Redis storage so the limit holds across workers; per-process limits if Redis is down
+limiter = Limiter(
+    key_func=get_remote_address,
+    storage_uri=settings.REDIS_URL,
+    # The sync Redis client runs inline on the event loop; don't let a dead Redis stall it
+    storage_options={"socket_connect_timeout": 1, "socket_timeout": 1},
+    in_memory_fallback_enabled=True,
+)
+app.state.limiter = limiter
+app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
+
 # Get origins from environment variables
 ORIGINS = os.environ.get('ALLOWED_ORIGINS', 'http://localhost:5173,https://reddit-memes-ui.vercel.app')
 allowed_origins = ORIGINS.split(',')
 
+# Cache policy per endpoint; added before CORS so CORS headers wrap cached responses
+app.add_middleware(
+    CacheMiddleware,
+    policies={
+        "/memes/top": CachePolicy(settings.CACHE_POLICY_SHORT, params=("limit",)),
+        "/memes/allmemes": CachePolicy(
+            settings.CACHE_POLICY_NORMAL,
+            params=("cursor", "limit", "sort_by", "order"),
+        ),
+        "/health": CachePolicy(settings.CACHE_POLICY_SHORT, fallback=False),
+    },
+)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -45,16 +110,49 @@ app.add_middleware(
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-class TelegramCredentials(BaseModel):
-    bot_token: Optional[str] = Field(None, description="Telegram Bot Token")
-    chat_id: Optional[str] = Field(None, description="Telegram Chat ID")
+def get_reddit_service(request: Request) -> RedditService:
+    """Return the app-wide RedditService created in lifespan"""
+    return request.app.state.reddit
+
+async def _check_reddit(reddit_service: RedditService) -> dict:
+    """Check Reddit API connectivity"""
+    try:
+        # Bypass the listing cache so the probe actually reaches Reddit
+        await reddit_service.fetch_top_memes(1, use_cache=False)
+        return {
+            "status": "healthy",
+            "details": "Successfully connected to Reddit API"
+        }
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "details": f"Failed to connect to Reddit API: {str(e)}"
+        }
+
+def _check_db(db: Session) -> dict:
+    """Check database connectivity"""
+    try:
+        # Simple query to check database connection
+        db.execute(text("SELECT 1"))
+        return {
+            "status": "healthy",
+            "details": "Successfully connected to database"
+        }
+    except Exception as e:
+        return {
+            "status": "unhealthy",
+            "details": f"Failed to connect to database: {str(e)}"
+        }
 
 @app.get("/health",
     summary="Check API health status",
     description="Checks the health of the API including Reddit API and database connections",
     response_description="Health status of different components"
 )
-async def health_check(db: Session = Depends(get_db)):
+async def health_check(
+    db: Session = Depends(get_db),
+    reddit_service: RedditService = Depends(get_reddit_service)
+):
     health_status = {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
@@ -74,34 +172,14 @@ async def health_check(db: Session = Depends(get_db)):
         }
     }
     
-    # Check Reddit API
-    try:
-        async with RedditService() as reddit_service:
-            await reddit_service.fetch_top_memes(1)
-            health_status["components"]["reddit_api"] = {
-                "status": "healthy",
-                "details": "Successfully connected to Reddit API"
-            }
-    except Exception as e:
-        health_status["components"]["reddit_api"] = {
-            "status": "unhealthy",
-            "details": f"Failed to connect to Reddit API: {str(e)}"
-        }
-        health_status["status"] = "degraded"
-
-    # Check database
-    try:
-        # Simple query to check database connection
-        db.execute(text("SELECT 1"))
-        health_status["components"]["database"] = {
-            "status": "healthy",
-            "details": "Successfully connected to database"
-        }
-    except Exception as e:
-        health_status["components"]["database"] = {
-            "status": "unhealthy",
-            "details": f"Failed to connect to database: {str(e)}"
-        }
+    # Probe Reddit and the database concurrently; the sync DB session runs off the loop
+    reddit_status, db_status = await asyncio.gather(
+        _check_reddit(reddit_service),
+        asyncio.to_thread(_check_db, db)
+    )
+    health_status["components"]["reddit_api"] = reddit_status
+    health_status["components"]["database"] = db_status
+    if "unhealthy" in (reddit_status["status"], db_status["status"]):
         health_status["status"] = "degraded"
 
     # If any component is unhealthy, set response code to 503
@@ -113,33 +191,48 @@ async def health_check(db: Session = Depends(get_db)):
 
     return health_status
 
+@cache(expire=settings.CACHE_POLICY_LONG)
+async def _get_top_memes_cached(reddit_service: RedditService, limit: int):
+    """Fetch top image memes from Reddit for a Telegram report, cached in Redis"""
+    return await reddit_service.fetch_top_memes(limit, images_only=True)
+
+async def _fetch_and_send(reddit_service: RedditService, limit: int, bot_token: str, chat_id: str):
+    """Fetch top memes and send them to Telegram, run as a background task"""
+    try:
+        memes = await _get_top_memes_cached(reddit_service, limit)
+        telegram_service = TelegramService(bot_token, chat_id, client=app.state.telegram_client)
+        await telegram_service.send_meme_report(memes)
+    except Exception as e:
+        logger.error("Error sending meme report in background: %s", redact_token(str(e), bot_token))
+
 @app.get("/memes/top")
+@limiter.limit(settings.RATE_LIMIT_TOP)
 async def get_top_memes(
+    request: Request,
     limit: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    reddit_service: RedditService = Depends(get_reddit_service)
 ):
     """Get top memes and store them in database"""
     try:
-        # Use async context manager for RedditService
-        async with RedditService() as reddit_service:
-            memes = await reddit_service.fetch_top_memes(limit)
-            
-            # Store in database
-            for meme_data in memes:
-                existing_meme = db.query(models.Meme).filter(
-                    models.Meme.reddit_id == meme_data["reddit_id"]
-                ).first()
-                
-                if not existing_meme:
-                    meme = models.Meme(**meme_data)
-                    db.add(meme)
-                else:
-                    for key, value in meme_data.items():
-                        setattr(existing_meme, key, value)
+        memes = await reddit_service.fetch_top_memes(limit)
+
+        # Store in database with a single upsert
+        if memes:
+            stmt = insert(models.Meme).values(memes)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["reddit_id"],
+                set_={
+                    column.name: stmt.excluded[column.name]
+                    for column in models.Meme.__table__.columns
+                    if column.name not in ("id", "reddit_id", "created_at")
+                }
+            )
+            db.execute(stmt)
             db.commit()
-            return memes
+        return memes
     except Exception as e:
-        logger.error(f"Error in get_top_memes: {e}")
+        logger.error("Error in get_top_memes: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
     
@@ -147,16 +240,18 @@ async def get_top_memes(
 async def get_meme_history(
     cursor: Optional[str] = None,
     limit: int = Query(20, ge=1, le=100),
-    sort_by: str = Query("created_at", regex="^(created_at|score|reddit_created_at|num_comments)$"),
-    order: str = Query("desc", regex="^(asc|desc)$"),
+    sort_by: Literal["created_at", "score", "reddit_created_at", "num_comments"] = "created_at",
+    order: Literal["asc", "desc"] = "desc",
     db: Session = Depends(get_db)
 ):
     """Get cursor-paginated meme history"""
     try:
         db_service = MemeDBService(db)
         return db_service.get_paginated_memes(cursor, limit, sort_by, order)
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error in get_meme_history: {e}")
+        logger.error("Error in get_meme_history: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
     
 @app.post("/memes/send-report",
@@ -178,7 +273,8 @@ async def get_meme_history(
 async def send_meme_report(
     background_tasks: BackgroundTasks,
     request: Optional[MemeReportRequest] = None,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    reddit_service: RedditService = Depends(get_reddit_service)
 ):
     """Send meme report to Telegram"""
     try:
@@ -209,13 +305,8 @@ async def send_meme_report(
                 detail="Please provide a valid Telegram chat ID or set TELEGRAM_CHAT_ID environment variable"
             )
 
-        # Get memes
-        async with RedditService() as reddit_service:
-            memes = await reddit_service.fetch_top_memes(limit)
-        # Initialize Telegram service
-        telegram_service = TelegramService(bot_token, chat_id)
-        # Send report in background
-        background_tasks.add_task(telegram_service.send_meme_report, memes)
+        # Fetch and send report in background
+        background_tasks.add_task(_fetch_and_send, reddit_service, limit, bot_token, chat_id)
         
         return {
             "message": "Meme report is being sent to Telegram",
@@ -224,5 +315,5 @@ async def send_meme_report(
         }
     
     except Exception as e:
-        logger.error(f"Error in send_meme_report: {str(e)}")
+        logger.error("Error in send_meme_report: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
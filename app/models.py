@@ -1,9 +1,16 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, Float, Boolean, Index
 from .database import Base
 from datetime import datetime
 
 class Meme(Base):
     __tablename__ = "memes"
+    # (sort column, id) indexes back the cursor pagination in MemeDBService
+    __table_args__ = (
+        Index("ix_memes_created_at_id", "created_at", "id"),
+        Index("ix_memes_score_id", "score", "id"),
+        Index("ix_memes_reddit_created_at_id", "reddit_created_at", "id"),
+        Index("ix_memes_num_comments_id", "num_comments", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     reddit_id = Column(String, unique=True, index=True)
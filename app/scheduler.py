@@ -4,13 +4,14 @@ from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
 import logging
 from .services.reddit import RedditService
-from .services.telegram_report import TelegramService
+from .services.telegram_report import TelegramService, redact_token
 import os
 
 logger = logging.getLogger(__name__)
 
-async def send_scheduled_report():
+async def send_scheduled_report(app):
     """Send periodic meme report to Telegram"""
+    bot_token = None
     try:
         # Get credentials from environment
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
@@ -19,39 +20,28 @@ async def send_scheduled_report():
             logger.error("Missing Telegram credentials in environment variables")
             return
         # Fetch memes
-        async with RedditService() as reddit_service:
-            memes = await reddit_service.fetch_top_memes(20)
+        reddit_service: RedditService = app.state.reddit
+        memes = await reddit_service.fetch_top_memes(20, images_only=True)
         # Send report
-        telegram_service = TelegramService(bot_token, chat_id)
+        telegram_service = TelegramService(bot_token, chat_id, client=app.state.telegram_client)
         await telegram_service.send_meme_report(memes)
         
         logger.info("Successfully sent scheduled meme report")
             
     except Exception as e:
-        logger.error(f"Error in scheduled meme report: {str(e)}")
+        logger.error("Error in scheduled meme report: %s", redact_token(str(e), bot_token))
 
 def init_scheduler(app):
-    """Initialize the scheduler"""
+    """Initialize the scheduler; it is started and stopped by the app lifespan"""
     scheduler = AsyncIOScheduler()
     # Schedule task to run every  minute
     scheduler.add_job(
         send_scheduled_report,
         CronTrigger(hour="0,8,16"),#IntervalTrigger(minutes=10)
+        args=[app],
         id="meme_report",
         name="Send meme report to Telegram",
         replace_existing=True
     )
-    
-    # Start scheduler on app startup
-    @app.on_event("startup")
-    async def start_scheduler():
-        scheduler.start()
-        logger.info("Started scheduled meme reports")
-    
-    # Shutdown scheduler when app stops
-    @app.on_event("shutdown")
-    async def stop_scheduler():
-        scheduler.shutdown()
-        logger.info("Stopped scheduled meme reports")
 
     return scheduler
\ No newline at end of file
@@ -1,12 +1,87 @@
-from sqlalchemy import text
+from sqlalchemy import Integer, bindparam, select, tuple_
 from typing import Dict, Optional
 import logging
 from fastapi import HTTPException
-from base64 import b64encode, b64decode
-import json
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime, timedelta
+import hashlib
+import hmac
+import msgpack
+from ..config import settings
+from ..models import Meme
 
 logger = logging.getLogger(__name__)
 
+SORT_FIELDS = ("created_at", "score", "reddit_created_at", "num_comments")
+SORT_IDS = {sort_by: i for i, sort_by in enumerate(SORT_FIELDS)}
+
+_DATETIME_FIELDS = {"created_at", "reddit_created_at"}
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+_SIGNATURE_SIZE = 16
+_cursor_key = settings.CURSOR_SECRET.encode()
+
+
+def _sign(payload: bytes) -> bytes:
+    return hmac.new(_cursor_key, payload, hashlib.sha256).digest()[:_SIGNATURE_SIZE]
+
+
+def _encode_cursor(sort_by: str, value, row_id: int) -> str:
+    """Pack (sort field, value, id) with msgpack and sign it"""
+    if isinstance(value, datetime):
+        # Columns are naive UTC; store microseconds since epoch
+        value = (value - _EPOCH) // _MICROSECOND
+    payload = msgpack.packb((SORT_IDS[sort_by], value, row_id))
+    return urlsafe_b64encode(_sign(payload) + payload).rstrip(b"=").decode()
+
+
+def _decode_cursor(cursor: str, sort_by: str):
+    """Verify and unpack a cursor, returning (value, id)"""
+    raw = urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+    signature, payload = raw[:_SIGNATURE_SIZE], raw[_SIGNATURE_SIZE:]
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise ValueError("Bad cursor signature")
+
+    sort_id, value, row_id = msgpack.unpackb(payload)
+    if sort_id != SORT_IDS[sort_by]:
+        raise ValueError("Cursor was issued for a different sort field")
+    if sort_by in _DATETIME_FIELDS:
+        value = _EPOCH + value * _MICROSECOND
+    return value, row_id
+
+_memes = Meme.__table__
+
+
+def _build_statement(sort_by: str, order: str, with_cursor: bool):
+    """Build the page query for one sort field, direction and cursor combination"""
+    column = _memes.c[sort_by]
+    stmt = select(_memes)
+
+    if with_cursor:
+        # Row comparison with id as tiebreaker keeps pages stable on duplicate keys
+        key = tuple_(column, _memes.c.id)
+        bound = tuple_(
+            bindparam("cursor", type_=column.type),
+            bindparam("cursor_id", type_=Integer),
+        )
+        stmt = stmt.where(key < bound if order == "desc" else key > bound)
+
+    if order == "desc":
+        stmt = stmt.order_by(column.desc(), _memes.c.id.desc())
+    else:
+        stmt = stmt.order_by(column.asc(), _memes.c.id.asc())
+
+    return stmt.limit(bindparam("limit", type_=Integer))
+
+
+# Built once so SQLAlchemy's compiled cache is hit on every request
+_STATEMENTS = {
+    (sort_by, order, with_cursor): _build_statement(sort_by, order, with_cursor)
+    for sort_by in SORT_FIELDS
+    for order in ("asc", "desc")
+    for with_cursor in (False, True)
+}
+
 class MemeDBService:
     def __init__(self, db):
         self.db = db
@@ -19,61 +94,44 @@ class MemeDBService:
         order: str = "desc"
     ) -> Dict:
         try:
-            # Validate sort field
-            valid_sort_fields = ["created_at", "score", "reddit_created_at", "num_comments"]
-            if sort_by not in valid_sort_fields:
-                raise HTTPException(status_code=400, detail=f"Invalid sort field")
-
             # Parse cursor
-            cursor_value = None
+            cursor_value = cursor_id = None
             if cursor:
                 try:
-                    cursor_data = json.loads(b64decode(cursor.encode()).decode())
-                    cursor_value = cursor_data.get(sort_by)
+                    cursor_value, cursor_id = _decode_cursor(cursor, sort_by)
                 except:
                     raise HTTPException(status_code=400, detail="Invalid cursor")
 
-            # Build query
-            query = """
-                SELECT 
-                    id, reddit_id, title, url, score, 
-                    upvote_ratio, created_at, reddit_created_at, 
-                    author, num_comments, permalink, 
-                    thumbnail, is_video
-                FROM memes
-            """
-            
             params = {"limit": limit + 1}  # +1 to check if there are more pages
-            
-            if cursor_value:
-                op = "<" if order.lower() == "desc" else ">"
-                query += f" WHERE {sort_by} {op} :cursor"
-                params["cursor"] = cursor_value
 
-            query += f" ORDER BY {sort_by} {'DESC' if order.lower() == 'desc' else 'ASC'}"
-            query += " LIMIT :limit"
+            if cursor_id is not None:
+                params["cursor"] = cursor_value
+                params["cursor_id"] = cursor_id
 
             # Execute query
-            result = self.db.execute(text(query), params)
-            memes = result.mappings().all()
+            stmt = _STATEMENTS[(sort_by, order, cursor_id is not None)]
+            result = self.db.execute(stmt, params)
+            memes = result.mappings().fetchmany(limit + 1)
 
             # Check if there are more pages
             has_next = len(memes) > limit
-            memes = memes[:limit]  # Remove the extra item we fetched
+            if has_next:
+                memes.pop()  # Remove the extra item we fetched
 
             # Create next cursor
             next_cursor = None
             if has_next and memes:
                 last_item = memes[-1]
-                cursor_data = {sort_by: str(last_item[sort_by])}
-                next_cursor = b64encode(json.dumps(cursor_data).encode()).decode()
+                next_cursor = _encode_cursor(sort_by, last_item[sort_by], last_item["id"])
 
             return {
-                "items": [dict(meme) for meme in memes],
+                "items": memes,
                 "next_cursor": next_cursor,
                 "has_next": has_next
             }
 
+        except HTTPException:
+            raise
         except Exception as e:
-            logger.error(f"Error fetching paginated memes: {e}")
+            logger.error("Error fetching paginated memes: %s", e)
             raise
\ No newline at end of file
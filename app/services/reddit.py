@@ -1,56 +1,126 @@
 # app/services/reddit.py
 import aiohttp
+import asyncio
 import base64
-from datetime import datetime, timedelta
+from cachetools import TTLCache
+from datetime import datetime, timedelta, timezone
 import logging
+import msgspec
 from typing import List, Dict, Optional
 import os
 from dotenv import load_dotenv
+from yarl import URL
+from ..config import settings
+from .retry import retry_transient
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+_UTC = timezone.utc
+
+
+class RedditPost(msgspec.Struct):
+    """Fields of a Reddit post that we keep; everything else is skipped while decoding"""
+    id: str
+    title: str
+    url: str
+    score: int
+    upvote_ratio: float
+    author: str
+    num_comments: int
+    permalink: str
+    created_utc: float
+    url_overridden_by_dest: Optional[str] = None
+    thumbnail: Optional[str] = None
+    is_video: bool = False
+
+
+class _Child(msgspec.Struct):
+    data: RedditPost
+
+
+class _ListingData(msgspec.Struct):
+    children: List[_Child]
+
+
+class _Listing(msgspec.Struct):
+    data: _ListingData
+
+
+_listing_decoder = msgspec.json.Decoder(_Listing)
+
+
+def _post_url(post: RedditPost) -> str:
+    return post.url_overridden_by_dest or post.url
+
+
+def _to_meme(post: RedditPost, url: str, _fromts=datetime.fromtimestamp, _tz=_UTC) -> Dict:
+    """Shape one Reddit post into a meme record"""
+    return {
+        "reddit_id": post.id,
+        "title": post.title,
+        "url": url,
+        "score": post.score,
+        "upvote_ratio": post.upvote_ratio,
+        "author": post.author,
+        "num_comments": post.num_comments,
+        "permalink": f"https://reddit.com{post.permalink}",
+        # created_utc is a UTC epoch; a fixed tz skips the localtime() lookup.
+        # Stored naive like the other timestamp columns, so Postgres never shifts it
+        "reddit_created_at": _fromts(post.created_utc, _tz).replace(tzinfo=None),
+        "thumbnail": post.thumbnail,
+        "is_video": post.is_video
+    }
+
 class RedditService:
-    def __init__(self):
+    def __init__(self, session: aiohttp.ClientSession):
         # Only client credentials required
         self.client_id = os.getenv('REDDIT_CLIENT_ID')
         self.client_secret = os.getenv('REDDIT_CLIENT_SECRET')
         
         if not all([self.client_id, self.client_secret]):
             raise ValueError("Missing required Reddit client credentials in environment variables")
-        
+
+        # Credentials don't change for the life of the service
+        self._basic_auth = base64.b64encode(
+            f"{self.client_id}:{self.client_secret}".encode()
+        ).decode()
+
         self.base_url = "https://oauth.reddit.com/r/memes"
-        self.auth_url = "https://www.reddit.com/api/v1/access_token"
-        self.session = None
+        self.auth_url = URL("https://www.reddit.com/api/v1/access_token")
+        # Parsed once; aiohttp uses yarl URLs as-is
+        self._top_url = URL(f"{self.base_url}/top")
+        # The app-wide session, shared with the rest of the app and closed by its lifespan
+        self.session = session
         self.access_token = None
         self.token_expiry = None
+        self._token_lock = asyncio.Lock()
+        self._headers: Dict[str, str] = {}
+        # Listings change slowly; absorb repeat fetches and spare the rate limit
+        self._cache = TTLCache(maxsize=128, ttl=settings.REDDIT_CACHE_SECONDS)
+        # One in-flight fetch per cache key, shared by concurrent misses
+        self._inflight: Dict[tuple, asyncio.Task] = {}
 
-    async def __aenter__(self):
-        """Async context manager entry"""
-        self.session = aiohttp.ClientSession()
-        await self.ensure_valid_token()
-        return self
-
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        """Async context manager exit"""
-        if self.session:
-            await self.session.close()
+    def _token_is_fresh(self) -> bool:
+        return bool(self.access_token and self.token_expiry and datetime.now() < self.token_expiry)
 
     async def ensure_valid_token(self):
         """Ensure we have a valid access token, refreshing if necessary."""
-        if not self.access_token or not self.token_expiry or datetime.now() >= self.token_expiry:
+        if self._token_is_fresh():
+            return
+        # Only one coroutine refreshes; the others wait and reuse its token
+        async with self._token_lock:
+            if self._token_is_fresh():
+                return
             await self.refresh_access_token()
 
     async def refresh_access_token(self):
         """Obtain a new access token using client credentials."""
         try:
-            auth_string = base64.b64encode(
-                f"{self.client_id}:{self.client_secret}".encode()
-            ).decode()
-
             headers = {
-                "Authorization": f"Basic {auth_string}",
+                "Authorization": f"Basic {self._basic_auth}",
                 "User-Agent": "python:meme_app:v1.0"
             }
 
@@ -67,6 +137,12 @@ class RedditService:
                 auth_data = await response.json()
 
                 self.access_token = auth_data["access_token"]
+                self._headers = {
+                    "Authorization": f"Bearer {self.access_token}",
+                    "User-Agent": "python:meme_app:v1.0",
+                    # Listings are verbose JSON; aiohttp decompresses transparently
+                    "Accept-Encoding": "gzip, deflate"
+                }
                 self.token_expiry = datetime.now() + timedelta(
                     seconds=auth_data["expires_in"] - 300
                 )
@@ -74,54 +150,78 @@ class RedditService:
                 logger.info("Successfully refreshed Reddit access token")
 
         except Exception as e:
-            logger.error(f"Failed to refresh access token: {e}")
+            logger.error("Failed to refresh access token: %s", e)
             raise
 
     def get_headers(self) -> Dict[str, str]:
-        """Get headers with current access token."""
-        return {
-            "Authorization": f"Bearer {self.access_token}",
-            "User-Agent": "python:meme_app:v1.0"
-        }
-
-    async def fetch_top_memes(self, limit: int = 20) -> List[Dict]:
-        """Fetch top memes, filtering for image posts only."""
+        """Get headers with current access token, built once per token refresh."""
+        return self._headers
+
+    async def fetch_top_memes(
+        self,
+        limit: int = 20,
+        images_only: bool = False,
+        use_cache: bool = True
+    ) -> List[Dict]:
+        """Fetch top memes, served from a short-lived in-process cache unless use_cache is False."""
+        if not use_cache:
+            # A single attempt: uncached callers such as the health probe want Reddit's current state
+            return await self._fetch_top_memes(limit, images_only, retry=False)
+
+        key = ("top", limit, images_only)
+        memes = self._cache.get(key)
+        if memes is not None:
+            return memes
+        # Concurrent misses for the same key wait for a single Reddit call
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill_cache(key, limit, images_only))
+            self._inflight[key] = task
+        # Shielded so one cancelled caller doesn't cancel the fetch for the rest
+        return await asyncio.shield(task)
+
+    async def _fill_cache(self, key: tuple, limit: int, images_only: bool) -> List[Dict]:
         try:
-            await self.ensure_valid_token()
-            url = f"{self.base_url}/top"
-            params = {"limit": limit, "t": "day"}
-            
-            async with self.session.get(
-                url,
-                headers=self.get_headers(),
-                params=params
-            ) as response:
-                response.raise_for_status()
-                data = await response.json()
-                
-                memes = []
-                for post in data['data']['children']:
-                    post_data = post['data']
-                    meme = {
-                        "reddit_id": post_data['id'],
-                        "title": post_data['title'],
-                        "url": post_data.get('url_overridden_by_dest', post_data['url']),
-                        "score": post_data['score'],
-                        "upvote_ratio": post_data['upvote_ratio'],
-                        "author": post_data['author'],
-                        "num_comments": post_data['num_comments'],
-                        "permalink": f"https://reddit.com{post_data['permalink']}",
-                        "reddit_created_at": datetime.fromtimestamp(post_data['created_utc']),
-                        "thumbnail": post_data.get('thumbnail'),
-                        "is_video": post_data.get('is_video', False)
-                    }
-                    # if meme['url'].endswith(('.jpg', '.jpeg', '.png', '.gif')):
-                    memes.append(meme)
-                        
-                memes.sort(key=lambda x: x["score"], reverse=True)
-                logger.info(f"Successfully fetched {len(memes)} memes")
-                return memes
+            memes = await self._fetch_top_memes(limit, images_only)
+            self._cache[key] = memes
+            return memes
+        finally:
+            self._inflight.pop(key, None)
 
+    async def _fetch_top_memes(self, limit: int, images_only: bool, retry: bool = True) -> List[Dict]:
+        """Fetch top memes, logging once if every attempt fails."""
+        fetch = self._get_top_memes_retrying if retry else self._get_top_memes
+        try:
+            return await fetch(limit, images_only)
         except Exception as e:
-            logger.error(f"Error fetching memes from Reddit: {e}")
+            logger.error("Error fetching memes from Reddit: %s", e)
             raise
+
+    async def _get_top_memes(self, limit: int, images_only: bool) -> List[Dict]:
+        """Fetch top memes, optionally filtering for image posts only."""
+        await self.ensure_valid_token()
+        url = self._top_url.with_query(limit=limit, t="day")
+
+        async with self.session.get(
+            url,
+            headers=self.get_headers()
+        ) as response:
+            response.raise_for_status()
+            # Decode straight into typed structs, skipping unused post fields
+            listing = _listing_decoder.decode(await response.read())
+
+            # Non-image posts are filtered out before any per-post shaping
+            memes = [
+                _to_meme(post, post_url)
+                for child in listing.data.children
+                for post in (child.data,)
+                for post_url in (_post_url(post),)
+                if not images_only or post_url.lower().endswith(_IMAGE_EXTENSIONS)
+            ]
+
+            # Reddit's top listing is already ordered by score
+            logger.info("Successfully fetched %d memes", len(memes))
+            return memes
+
+    # Callers wait on this, so keep retries short
+    _get_top_memes_retrying = retry_transient(max_attempts=3, max_delay=10)(_get_top_memes)
@@ -0,0 +1,90 @@
+# app/services/retry.py
+import asyncio
+import logging
+import aiohttp
+import httpx
+from tenacity import (
+    retry,
+    retry_if_exception,
+    wait_exponential_jitter,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rate limits and transient server errors are worth another attempt
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRY_AFTER = 60
+
+_backoff = wait_exponential_jitter(initial=1, max=30)
+
+
+def _status_and_headers(exc):
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status, exc.headers
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code, exc.response.headers
+    return None, None
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Any timeout, connection error or retryable status; for idempotent requests"""
+    if isinstance(exc, (asyncio.TimeoutError, aiohttp.ClientConnectionError, httpx.TransportError)):
+        return True
+    status, _ = _status_and_headers(exc)
+    return status in RETRY_STATUSES
+
+
+def is_unsent(exc: BaseException) -> bool:
+    """Failures where the server cannot have acted on the request; for non-idempotent requests"""
+    if isinstance(exc, (aiohttp.ClientConnectorError, httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    status, _ = _status_and_headers(exc)
+    return status == 429
+
+
+def describe_error(exc: BaseException) -> str:
+    """Status code or exception type only; messages can carry URLs with credentials in them"""
+    status, _ = _status_and_headers(exc)
+    if status is not None:
+        return f"HTTP {status}"
+    return type(exc).__name__
+
+
+def _log_retry(retry_state):
+    logger.warning(
+        "Retrying %s in %.1fs after %s",
+        retry_state.fn.__qualname__,
+        retry_state.next_action.sleep,
+        describe_error(retry_state.outcome.exception()),
+    )
+
+
+def _wait(retry_state) -> float:
+    """Sleep for the server's Retry-After on 429, otherwise back off exponentially"""
+    status, headers = _status_and_headers(retry_state.outcome.exception())
+    if status == 429 and headers:
+        try:
+            return min(float(headers.get("Retry-After")), MAX_RETRY_AFTER)
+        except (TypeError, ValueError):
+            pass
+    return _backoff(retry_state)
+
+
+def _stop(max_attempts: int, max_delay: float):
+    """Give up after max_attempts, or when the next wait would overrun max_delay seconds"""
+    def stop(retry_state) -> bool:
+        if retry_state.attempt_number >= max_attempts:
+            return True
+        return retry_state.seconds_since_start + _wait(retry_state) > max_delay
+    return stop
+
+
+def retry_transient(max_attempts: int = 5, max_delay: float = 60, retry_on=is_transient):
+    """Retry an async call on failures matched by retry_on, within an overall time budget"""
+    return retry(
+        stop=_stop(max_attempts, max_delay),
+        wait=_wait,
+        retry=retry_if_exception(retry_on),
+        before_sleep=_log_retry,
+        reraise=True,
+    )
@@ -1,49 +1,117 @@
-import requests
-from typing import List, Dict
+import asyncio
+import httpx
+import orjson
+from typing import List, Dict, Optional
 import logging
 from datetime import datetime
+from .retry import retry_transient, is_unsent, describe_error
 
 logger = logging.getLogger(__name__)
 
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+# Telegram albums hold 2-10 photos
+MEDIA_GROUP_SIZE = 10
+
+# Above this many memes, caption formatting runs in a worker thread
+CAPTION_OFFLOAD_THRESHOLD = 500
+
+def create_client() -> httpx.AsyncClient:
+    """HTTP/2 client that multiplexes every request of a report over one TLS connection"""
+    return httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+        timeout=30
+    )
+
 class TelegramService:
-    def __init__(self, bot_token: str, chat_id: str):
+    def __init__(self, bot_token: str, chat_id: str, client: Optional[httpx.AsyncClient] = None):
         self.bot_token = bot_token
         self.chat_id = chat_id
         self.base_url = f"https://api.telegram.org/bot{bot_token}"
+        self._method_urls = {
+            method: f"{self.base_url}/{method}"
+            for method in ("sendMessage", "sendPhoto", "sendMediaGroup")
+        }
+        # Prefer the app-wide client so connections outlive a single report
+        self._owns_client = client is None
+        self._client = client or create_client()
+
+    async def aclose(self):
+        """Close the HTTP client if this service created it"""
+        if self._owns_client:
+            await self._client.aclose()
 
     async def send_meme_report(self, memes: List[Dict]) -> bool:
         try:
             current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             message = f"🎯 Top {len(memes)} Memes Report - {current_time}\n\n"
             # First, send the overview message
-            url = f"{self.base_url}/sendMessage"
-            payload = {
+            await self._post("sendMessage", {
                 "chat_id": self.chat_id,
                 "text": message,
                 "parse_mode": "HTML"
-            }
-            response = requests.post(url, json=payload)
-            response.raise_for_status()
-            # Then send each meme with its image
-            for i, meme in enumerate(memes, 1):
-                caption = (
-                    f"{i}. {meme['title']}\n"
-                    f"👍 Score: {meme['score']} | 💬 Comments: {meme['num_comments']}\n"
-                    f"🔗 {meme['permalink']}"
-                )
-                # Send photo with caption
-                url = f"{self.base_url}/sendPhoto"
-                payload = {
-                    "chat_id": self.chat_id,
-                    "photo": meme['url'],
-                    "caption": caption,
-                    "parse_mode": "HTML"
-                }
-                response = requests.post(url, json=payload)
-                response.raise_for_status()
+            })
+            if len(memes) > CAPTION_OFFLOAD_THRESHOLD:
+                captions = await asyncio.to_thread(_build_captions, memes)
+            else:
+                captions = _build_captions(memes)
+            # Then send the memes as albums of up to 10 photos, in rank order
+            for start in range(0, len(memes), MEDIA_GROUP_SIZE):
+                end = start + MEDIA_GROUP_SIZE
+                await self._send_album(memes[start:end], captions[start:end])
             logger.info("Successfully sent meme report to Telegram")
             return True
 
-        except requests.RequestException as e:
-            logger.error(f"Error sending message to Telegram: {e}")
-            raise
\ No newline at end of file
+        except httpx.HTTPError as e:
+            logger.error("Error sending message to Telegram: %s", describe_error(e))
+            raise
+
+    async def _send_album(self, memes: List[Dict], captions: List[str]):
+        """Send a chunk of memes as one album, each photo with its own caption"""
+        if len(memes) == 1:
+            # sendMediaGroup rejects single-item albums
+            await self._post("sendPhoto", {
+                "chat_id": self.chat_id,
+                "photo": memes[0]['url'],
+                "caption": captions[0],
+                "parse_mode": "HTML"
+            })
+            return
+
+        media = [
+            {
+                "type": "photo",
+                "media": meme['url'],
+                "caption": caption,
+                "parse_mode": "HTML"
+            }
+            for meme, caption in zip(memes, captions)
+        ]
+        await self._post("sendMediaGroup", {"chat_id": self.chat_id, "media": media})
+
+    # Sends aren't idempotent: only retry when Telegram cannot have delivered the message
+    @retry_transient(max_attempts=5, max_delay=120, retry_on=is_unsent)
+    async def _post(self, method: str, payload: Dict):
+        """Call a Bot API method with an orjson-encoded body"""
+        response = await self._client.post(
+            self._method_urls[method],
+            content=orjson.dumps(payload),
+            headers=_JSON_HEADERS
+        )
+        response.raise_for_status()
+
+
+def redact_token(text: str, bot_token: str) -> str:
+    """Mask the bot token in an error message; httpx errors include the Bot API URL"""
+    return text.replace(bot_token, "<bot-token>") if bot_token else text
+
+
+def _build_captions(memes: List[Dict]) -> List[str]:
+    """Format the ranked caption for every meme in the report"""
+    return [
+        f"{i}. {meme['title']}\n"
+        f"👍 Score: {meme['score']} | 💬 Comments: {meme['num_comments']}\n"
+        f"🔗 {meme['permalink']}"
+        for i, meme in enumerate(memes, 1)
+    ]
\ No newline at end of file
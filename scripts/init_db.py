@@ -0,0 +1,17 @@
+# scripts/init_db.py
+"""Create database tables. Run once at deploy: python -m scripts.init_db"""
+import logging
+from app import models
+from app.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def init_db():
+    models.Base.metadata.create_all(bind=engine)
+    logger.info("Database tables created")
+
+
+if __name__ == "__main__":
+    init_db()
@@ -0,0 +1,7 @@
+-- (sort column, id) indexes back the cursor pagination in MemeDBService.
+-- Mirrors Meme.__table_args__; create_all skips existing tables, so deployed
+-- databases only get these through this migration.
+CREATE INDEX IF NOT EXISTS ix_memes_created_at_id ON memes (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_memes_score_id ON memes (score, id);
+CREATE INDEX IF NOT EXISTS ix_memes_reddit_created_at_id ON memes (reddit_created_at, id);
+CREATE INDEX IF NOT EXISTS ix_memes_num_comments_id ON memes (num_comments, id);
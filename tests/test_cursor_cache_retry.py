@@ -0,0 +1,127 @@
+# tests/test_cursor_cache_retry.py
+import asyncio
+from datetime import datetime
+
+import fakeredis.aioredis
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+
+from app import cache
+from app.cache import CacheMiddleware, CachePolicy
+from app.services.allmemes import MemeDBService, _decode_cursor, _encode_cursor
+from app.services.retry import retry_transient
+
+
+# Pagination cursors
+
+@pytest.mark.parametrize("sort_by, value", [
+    ("score", 4321),
+    ("num_comments", 0),
+    ("created_at", datetime(2024, 5, 17, 8, 30, 12, 345678)),
+    ("reddit_created_at", datetime(1999, 12, 31, 23, 59, 59)),
+])
+def test_cursor_round_trip(sort_by, value):
+    cursor = _encode_cursor(sort_by, value, 42)
+    assert _decode_cursor(cursor, sort_by) == (value, 42)
+
+
+def _flip_last_char(cursor: str) -> str:
+    return cursor[:-1] + ("A" if cursor[-1] != "A" else "B")
+
+
+def test_tampered_cursor_is_rejected():
+    cursor = _flip_last_char(_encode_cursor("score", 100, 7))
+    with pytest.raises(HTTPException) as exc_info:
+        MemeDBService(db=None).get_paginated_memes(cursor=cursor, sort_by="score")
+    assert exc_info.value.status_code == 400
+
+
+def test_cursor_for_other_sort_field_is_rejected():
+    cursor = _encode_cursor("score", 100, 7)
+    with pytest.raises(HTTPException) as exc_info:
+        MemeDBService(db=None).get_paginated_memes(cursor=cursor, sort_by="num_comments")
+    assert exc_info.value.status_code == 400
+
+
+# Response cache
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    redis = fakeredis.aioredis.FakeRedis()
+    monkeypatch.setattr(cache, "_redis", redis)
+    return redis
+
+
+def test_stale_response_served_on_upstream_5xx(fake_redis):
+    upstream = {"fail": False}
+    app = FastAPI()
+
+    @app.get("/memes")
+    async def memes():
+        if upstream["fail"]:
+            raise HTTPException(status_code=500, detail="upstream down")
+        return {"memes": ["first"]}
+
+    # A zero TTL makes every entry stale on the next request
+    app.add_middleware(CacheMiddleware, policies={"/memes": CachePolicy(0, params=("limit",))})
+    # One client context keeps every request on the same event loop as the fake Redis
+    with TestClient(app) as client:
+        fresh = client.get("/memes?limit=1")
+        assert fresh.headers["X-Cache"] == "MISS"
+
+        upstream["fail"] = True
+        stale = client.get("/memes?limit=1&ignored=1")
+
+    assert stale.status_code == 200
+    assert stale.headers["X-Cache"] == "STALE"
+    assert stale.json() == {"memes": ["first"]}
+
+
+# Retries
+
+def _rate_limited(retry_after: str) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "https://api.telegram.org/botTOKEN/sendMessage")
+    response = httpx.Response(429, headers={"Retry-After": retry_after}, request=request)
+    return httpx.HTTPStatusError("rate limited", request=request, response=response)
+
+
+def _flaky(failures: int, retry_after: str):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) <= failures:
+            raise _rate_limited(retry_after)
+        return "sent"
+
+    return call, calls
+
+
+def _with_recorded_sleeps(func, **policy):
+    sleeps = []
+
+    async def sleep(seconds):
+        sleeps.append(seconds)
+
+    return retry_transient(**policy)(func).retry_with(sleep=sleep), sleeps
+
+
+def test_retry_honours_retry_after_within_budget():
+    call, calls = _flaky(failures=2, retry_after="3")
+    wrapped, sleeps = _with_recorded_sleeps(call, max_attempts=5, max_delay=10)
+
+    assert asyncio.run(wrapped()) == "sent"
+    assert len(calls) == 3
+    assert sleeps == [3.0, 3.0]
+
+
+def test_retry_gives_up_when_retry_after_exceeds_budget():
+    call, calls = _flaky(failures=1, retry_after="120")
+    wrapped, sleeps = _with_recorded_sleeps(call, max_attempts=5, max_delay=10)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(wrapped())
+    assert len(calls) == 1
+    assert sleeps == []